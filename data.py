@@ -2,14 +2,29 @@
 import json
 import mapping
 import glob
+import os
+import queue
+import threading
 import matplotlib as mpl
 import matplotlib.pyplot as plt
 import numpy as np
 
 import os.path as path
+from concurrent.futures import ProcessPoolExecutor
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from hashlib import sha1
+from matchStore import MatchStore
 from statistics import mean 
 from sklearn import preprocessing
 
+try:
+    # considerably faster to decode the match files, json is used if it is not installed
+    from orjson import loads as loadJson
+except ImportError:
+    from json import loads as loadJson
+
 
 class Player:
 
@@ -74,23 +89,31 @@ class Player:
 
 class Team:
 
-    def __init__(self, data, includeBench):
+    # the mapper does not hold any state, so all teams share one
+    __mapper = mapping.PositionMapper()
+
+    def __init__(self, data, includeBench, grid=None):
+        """
+        If grid is given, the team is written into it instead of a newly allocated one
+        """
         self.__includeBench = includeBench
-        self.__grid = None
+        self.__grid = grid
         self.members = data
 
     def __updateGrid(self):
-        if self.__includeBench:
-            self.__grid = np.zeros((40,34))
+        if self.__grid is None:
+            if self.__includeBench:
+                self.__grid = np.zeros((40,34))
+            else:
+                self.__grid = np.zeros((20,34))
         else:
-            self.__grid = np.zeros((20,34))
+            self.__grid.fill(0)
         
         benchPos = 20
-        mapper = mapping.PositionMapper()
         for member in self.members:
             position = None
             if member.position != None:
-                position = mapper.map(member.position, member, self.__grid)
+                position = self.__mapper.map(member.position, member, self.__grid)
             elif self.__includeBench:
                 position = benchPos
                 benchPos += 1
@@ -132,12 +155,38 @@ class DataComposer:
 
     WINNING_LABELS = ["Win A", "Draw", "Win B"]
 
-    def __init__(self, directory: str, includeOldStats=True, includeBench=True, balance=False, scale = True):
+    def __init__(self, directory: str, includeOldStats=True, includeBench=True, balance=False, scale = True,
+                 cacheDirectory=None, workers=1, compact=False, seed=None, recursive=False, store=None,
+                 matchFilter=None, prefetch=0, exclude=None):
+        """
+        If recursive, the matches in all subdirectories of directory are included as well,
+        e.g. the league and season partitions written by the FixturesSpider, except for those in exclude.
+        If store is given, the matches are read from the match store in that file instead of directory,
+        filtered by matchFilter, a dict of league, season, since and until as taken by MatchStore.getIds.
+        prefetch is the number of match files read ahead while parsing, see FileLoader
+        """
         self.__includeBench = includeBench
         self.__includeOldStats = includeOldStats
         self.__balance = balance
-        self.__fileLoader = FileLoader(directory)
+        if store:
+            self.__loader = StoreLoader(MatchStore(store), **(matchFilter or {}))
+        else:
+            self.__loader = FileLoader(directory, recursive=recursive, prefetch=prefetch, exclude=exclude)
         self.__scale = scale
+        self.__cache = DataCache(cacheDirectory) if cacheDirectory else None
+        self.__workers = workers
+        # compact matches hold the raw skills as uint8 and are scaled by toFloat only when needed
+        self.__compact = compact
+        self.__dtype = np.uint8 if compact else np.float64
+        # seed of the random oversampling when balancing
+        self.__seed = seed
+
+    def __getOptions(self):
+        """
+        Returns the options that influence the composed data
+        """
+        return {"includeOldStats": self.__includeOldStats, "includeBench": self.__includeBench, "scale": self.__scale,
+                "compact": self.__compact}
 
     def getMatchWinner(self, score: str):
         arr = score.split("-")
@@ -147,114 +196,377 @@ class DataComposer:
             return self.WINNING_LABELS[2]
         return self.WINNING_LABELS[1]
 
-    def parseMatch(self, match):
+    def parseMatch(self, match, out=None):
+        """
+        Parses the given match. If out is given, the grids of both teams are written directly into it
+        """
         result = {"match": [], "result": -1}
-        teamA = Team(match["teams"][0], self.__includeBench)
-        teamB = Team(match["teams"][1], self.__includeBench)
+        if out is None:
+            out = np.empty(self.getMatchShape(), self.__dtype)
+
+        rows = len(out) // 2
+        Team(match["teams"][0], self.__includeBench, out[:rows])
+        Team(match["teams"][1], self.__includeBench, out[rows:])
 
-        result["match"] = np.asarray(list(teamA.grid) + list(teamB.grid))
+        if self.__scale and not self.__compact:
+            np.divide(out, 100, out=out)
 
-        if self.__scale:
-            result["match"] = np.divide(result["match"], 100)
-            
+        result["match"] = out
         result["result"] = self.getMatchWinner(match["score"])
         return result
 
     def getData(self):
-        print("[INFO] Composing data")
-        data = {"matches": [], "results": []}
-        file = self.__fileLoader.getNextFile()
-        while file:
-            mData = json.load(file)
-            skill = mData["teams"][0][0]["skill"]
-            if skill and ("lbs" not in skill[1][0] or self.__includeOldStats):
-                match = self.parseMatch(mData)
-                data["matches"].append(match["match"])
-                data["results"].append(match["result"])
+        data = None
+        if self.__cache:
+            key = self.__cache.getKey(self.__loader.getFingerprint(), self.__getOptions())
+            data = self.__cache.load(key)
+
+        if data is None:
+            data = self.__composeData()
+            if self.__cache:
+                self.__cache.save(key, data)
 
-            file = self.__fileLoader.getNextFile()
-        
-        #for index in range(len(data["matches"])):
-        #    data["matches"][index] = preprocessing.scale(data["matches"][index])
         if self.__balance:
             return self.balance(data)
-            
+
         return data
 
-    def balance(self, data):
-        matches = {"a": [], "b": [], "u": []}
-        count = range(len(data["results"]))
-        for index in count:
-            if data["results"][index] == self.WINNING_LABELS[0]:
-                matches["a"].append([data["matches"][index], data["results"][index]])
-            elif data["results"][index] == self.WINNING_LABELS[1]:
-                matches["u"].append([data["matches"][index], data["results"][index]])
-            else:
-                matches["b"].append([data["matches"][index], data["results"][index]])        
+    def toFloat(self, matches):
+        """
+        Converts the given matches to float32 to feed them to a model. Compact matches are scaled here
+        """
+        if self.__compact and self.__scale:
+            return np.divide(matches, 100, dtype=np.float32)
 
-        maximum = max([len(matches["a"]), len(matches["b"]), len(matches["u"])])
+        return np.asarray(matches, np.float32)
 
-        for winner in ["a", "b", "u"]:
-            while len(matches[winner]) < maximum:
-                random = np.random.randint(0, len(matches[winner]))
-                matches[winner].append(matches[winner][random])
+    def getMatchShape(self):
+        """
+        Returns the shape of a single composed match
+        """
+        # two teams with 20 rows each, 40 if the bench is included
+        if self.__includeBench:
+            return (80, 34)
+        return (40, 34)
 
-        ordered = []
-        for winner in ["a", "b", "u"]:
-            ordered += matches[winner]
+    def getKeys(self):
+        """
+        Returns the keys of the matches the data is composed from, file names or ids of a match store
+        """
+        return self.__loader.getKeys()
 
-        np.random.shuffle(ordered)
+    def loadMatches(self, keys):
+        """
+        Yields the given matches as they are saved, without parsing them
+        """
+        return self.__loader.loadMatches(keys)
+
+    def iterData(self, keys):
+        """
+        Parses the given matches one at a time and yields match and result of every included match
+        """
+        for mData in self.__loader.loadMatches(keys):
+            if self.isIncluded(mData):
+                match = self.parseMatch(mData)
+                yield match["match"], match["result"]
+
+    def isIncluded(self, match) -> bool:
+        """
+        Checks if the match has skills and old stats are allowed if it uses them
+        """
+        skill = match["teams"][0][0]["skill"]
+        return bool(skill) and ("lbs" not in skill[1][0] or self.__includeOldStats)
+
+    def composeBatch(self, keys):
+        """
+        Parses the given matches into one preallocated array. Returns the included matches and their results
+        """
+        matches = np.empty((len(keys),) + self.getMatchShape(), self.__dtype)
+        results = []
+        for mData in self.__loader.loadMatches(keys):
+            if self.isIncluded(mData):
+                match = self.parseMatch(mData, matches[len(results)])
+                results.append(match["result"])
 
-        matches = [match[0] for match in ordered]
-        results = [match[1] for match in ordered]
-    
+        if len(results) < len(matches):
+            # copy only the included matches, so the memory of the excluded ones is freed
+            matches = matches[:len(results)].copy()
+
+        return matches, results
+
+    def __composeData(self):
+        print("[INFO] Composing data")
+        keys = self.__loader.getKeys()
+        #for index in range(len(data["matches"])):
+        #    data["matches"][index] = preprocessing.scale(data["matches"][index])
+        if self.__workers <= 1:
+            matches, results = self.composeBatch(keys)
+            return {"matches": matches, "results": results}
+
+        # hand out several matches per task to keep the pickling overhead low
+        chunkSize = max(1, len(keys) // (self.__workers * 4))
+        chunks = [keys[index:index + chunkSize] for index in range(0, len(keys), chunkSize)]
+        with ProcessPoolExecutor(self.__workers) as executor:
+            # map keeps the order of the chunks, so the result equals the serial one
+            batches = list(executor.map(self.composeBatch, chunks))
+
+        results = []
+        for batch in batches:
+            results += batch[1]
+
+        matches = np.concatenate([batch[0] for batch in batches]) if batches else np.empty((0,) + self.getMatchShape(), self.__dtype)
         return {"matches": matches, "results": results}
 
+    def getResults(self, keys):
+        """
+        Reads the given matches once without parsing them. Returns the keys and results of the included ones
+        """
+        included = []
+        results = []
+        for key, match in zip(keys, self.__loader.loadMatches(keys)):
+            if self.isIncluded(match):
+                included.append(key)
+                results.append(self.getMatchWinner(match["score"]))
+
+        return included, results
+
+    def balanceIndexes(self, results):
+        """
+        Draws the indexes of the results in random order, oversampling the less frequent results until every
+        result occurs as often as the most frequent one
+        """
+        rng = np.random.default_rng(self.__seed)
+        results = np.asarray(results)
+        indexes = [np.flatnonzero(results == label) for label in self.WINNING_LABELS]
+        maximum = max(len(index) for index in indexes)
+
+        for label in range(len(indexes)):
+            missing = maximum - len(indexes[label])
+            # a result that never occurs can not be oversampled
+            if missing and len(indexes[label]):
+                indexes[label] = np.concatenate([indexes[label], rng.choice(indexes[label], missing)])
+
+        return rng.permutation(np.concatenate(indexes))
+
+    def balance(self, data):
+        """
+        Oversamples the less frequent results until every result occurs as often as the most frequent one.
+        Only indexes are drawn, the matches are gathered from the original data at once
+        """
+        order = self.balanceIndexes(data["results"])
+
+        return {"matches": np.asarray(data["matches"])[order], "results": np.asarray(data["results"])[order].tolist()}
+
+
+class DataCache:
+    """
+    Stores composed match tensors on disk, so unchanged match files do not have to be parsed again
+    """
+    # increase whenever the layout of the composed data changes
+    VERSION = 1
+
+    def __init__(self, directory: str):
+        self.__directory = directory
+
+    def __getPath(self, key: str) -> str:
+        return path.join(self.__directory, key + ".npz")
+
+    def getKey(self, fingerprint, options) -> str:
+        """
+        Generates the key of a data set from the fingerprint of its files and the options used to compose it
+        """
+        toHash = json.dumps([self.VERSION, fingerprint, options], sort_keys=True)
+        return sha1(toHash.encode("utf-8")).hexdigest()
+
+    def load(self, key: str):
+        """
+        Loads the data stored under the given key. Returns None if there is none
+        """
+        filePath = self.__getPath(key)
+        if not path.isfile(filePath):
+            return None
+
+        print("[INFO] Loading cached data")
+        with np.load(filePath) as cached:
+            return {"matches": cached["matches"], "results": cached["results"].tolist()}
+
+    def save(self, key: str, data):
+        """
+        Saves the given data under the given key
+        """
+        os.makedirs(self.__directory, exist_ok=True)
+        filePath = self.__getPath(key)
+        # write to a temporary file first, so an interrupted run can not leave a broken cache behind
+        tmpPath = filePath + ".tmp"
+        with open(tmpPath, "wb") as cacheFile:
+            np.savez(cacheFile, matches=np.asarray(data["matches"]), results=np.asarray(data["results"], np.str_))
+        os.replace(tmpPath, filePath)
+
 
 class FileLoader:
+    """
+    Iterates the matches saved in the files of a directory. Each file is read at once and closed right away
+    """
+
+    def __init__(self, directory: str, fileType = "txt", recursive=False, prefetch=0, exclude=None):
+        """
+        If recursive, the files of all subdirectories are included except for those in exclude,
+        given relative to directory. If prefetch is set, up to that many files are read ahead on a background thread
+        while the matches are parsed
+        """
+        # get all available files, sorted to keep the order stable between runs
+        if recursive:
+            excluded = tuple(path.join(directory, name, "") for name in exclude or [])
+            self.__filesNames = sorted(fileName for fileName in
+                                       glob.glob(path.join(directory, "**", "*." + fileType), recursive=True)
+                                       if not fileName.startswith(excluded))
+        else:
+            self.__filesNames = sorted(glob.glob(directory + "*." + fileType))
+        self.__prefetch = prefetch
 
-    def __init__(self, directory: str, fileType = "txt"):
-        # get all available files
-        self.__filesNames = glob.glob(directory + "*." + fileType)
-        # init current as 0
-        self.__current = 0
-        # save filecount to minimize runtime lateron
-        self.__fileCount = len(self.__filesNames)
+    def __iter__(self):
+        return self.loadMatches(self.__filesNames)
 
-    def getNextFile(self):
-        # check if there is still a file left
-        if self.hasNextFile():
-            # increase counter
-            self.__current += 1
-            # return next file
-            return open(self.__filesNames[self.__current], "r")
+    def __len__(self):
+        return len(self.__filesNames)
 
-        # no further files
-        return None
+    def getFileNames(self):
+        """
+        Returns the names of all files
+        """
+        return list(self.__filesNames)
 
-    def hasNextFile(self) -> bool:
-        return self.__current + 1 < self.__fileCount
+    def getKeys(self):
+        return self.getFileNames()
+
+    def __readFile(self, fileName: str) -> bytes:
+        with open(fileName, "rb") as file:
+            return file.read()
+
+    def __readAhead(self, fileNames):
+        """
+        Yields the contents of the files, read by a background thread up to prefetch files ahead
+        """
+        contents = queue.Queue(self.__prefetch)
+        stop = threading.Event()
+
+        def put(item) -> bool:
+            # check regularly, so the thread ends if the matches are not iterated to the end
+            while not stop.is_set():
+                try:
+                    contents.put(item, timeout=0.1)
+                    return True
+                except queue.Full:
+                    pass
+            return False
+
+        def read():
+            try:
+                for fileName in fileNames:
+                    if not put((self.__readFile(fileName), None)):
+                        return
+            except OSError as err:
+                put((None, err))
+                return
+            put((None, None))
+
+        reader = threading.Thread(target=read, daemon=True)
+        reader.start()
+        try:
+            while True:
+                content, err = contents.get()
+                if err:
+                    raise err
+                if content is None:
+                    return
+                yield content
+        finally:
+            stop.set()
+
+    def loadMatches(self, fileNames):
+        """
+        Yields the matches saved in the given files
+        """
+        if self.__prefetch > 0:
+            contents = self.__readAhead(fileNames)
+        else:
+            contents = (self.__readFile(fileName) for fileName in fileNames)
+
+        for content in contents:
+            yield loadJson(content)
+
+    def getFingerprint(self):
+        """
+        Describes the files by name, modification time and size to detect changes
+        """
+        fingerprint = []
+        for fileName in self.getFileNames():
+            stat = os.stat(fileName)
+            fingerprint.append([path.basename(fileName), stat.st_mtime_ns, stat.st_size])
+
+        return fingerprint
+
+
+class StoreLoader:
+    """
+    Reads the matches passing the given filters from a match store, see MatchStore.getIds
+    """
+
+    def __init__(self, store: MatchStore, league=None, season=None, since=None, until=None):
+        self.__store = store
+        self.__filters = {"league": league, "season": season, "since": since, "until": until}
+
+    def getKeys(self):
+        return self.__store.getIds(**self.__filters)
+
+    def loadMatches(self, matchIds):
+        return self.__store.load(matchIds)
+
+    def getFingerprint(self):
+        """
+        Describes the filtered matches of the store, including the filters themselves
+        """
+        return [self.__store.getFingerprint(**self.__filters), self.__filters]
 
 
 class DataPlotter:
 
-    def __init__(self, directory: str, outputDirectory: str):
-        self.__fileLoader = FileLoader(directory)
-        self.__directory = directory
+    SKILL_NAMES = ["Missing", "Not enough", "good"]
+
+    def __init__(self, directory: str, outputDirectory: str, recursive=False, exclude=None):
+        """
+        recursive and exclude select the files of partitioned directories like for the FileLoader
+        """
+        # filters the matches like for training and reads them, so the directory is only listed once
+        self.__composer = DataComposer(directory, includeBench=False, includeOldStats=False, recursive=recursive,
+                                       exclude=exclude)
         self.__outputDirectory = outputDirectory
 
-    def __plotYDistribution(self, data):
-        print("[INFO] Plotting Y distribution")
-        dc = DataComposer(self.__directory, includeBench=False, includeOldStats=False, balance=True)
-        # determine the winner of every match
-        yData = [winner for winner in dc.getData()["results"]]
-        # empty dict to save the result
-        counts = {}
-        # iterate possible outcomes
-        for label in DataComposer.WINNING_LABELS:
-            # count occurances of outcome in yData
-            counts[label] = yData.count(label)
+    def __countData(self):
+        """
+        Counts the results of the matches a model is trained with and the players by the state of their skill
+        in a single pass over the matches, without keeping them in memory
+        """
+        dc = self.__composer
+        results = dict.fromkeys(DataComposer.WINNING_LABELS, 0)
+        skills = dict.fromkeys(self.SKILL_NAMES, 0)
+        for match in dc.loadMatches(dc.getKeys()):
+            if dc.isIncluded(match):
+                results[dc.getMatchWinner(match["score"])] += 1
+
+            for team in match["teams"]:
+                for pl in team:
+                    if pl["skill"] == None:
+                        skills["Missing"] += 1
+                    elif "lbs" in pl["skill"][1][0]:
+                        skills["Not enough"] += 1
+                    else:
+                        skills["good"] += 1
+
+        return results, skills
 
+    def __plotYDistribution(self, counts):
+        print("[INFO] Plotting Y distribution")
         # separate names and values
         names = list(counts.keys())
         values = list(counts.values())
@@ -264,21 +576,10 @@ class DataPlotter:
         plt.savefig(self.__outputDirectory + "YDistribution.png")
         plt.clf()
 
-    def __plotMissingPlayerSkill(self, data):
+    def __plotMissingPlayerSkill(self, counts):
         print("[INFO] Plotting players missing skill")
-        players = []
-        for match in data:
-            for team in match["teams"]:
-                for pl in team:
-                    if pl["skill"] == None:
-                        players.append(0)
-                    elif "lbs" in pl["skill"][1][0]:
-                        players.append(1)
-                    else:
-                        players.append(2)
-
-        names = ["Missing", "Not enough", "good"]
-        values = [players.count(0), players.count(1), players.count(2)]
+        names = self.SKILL_NAMES
+        values = [counts[name] for name in names]
         percMissing = round(100 * values[0] / (values[0] + values[1] + values[2]), 2)
         percNEnough = round(100 * values[1] / (values[1] + values[2]), 2)
         plt.title("Missing skill: " + str(percMissing) + "%, not enough: " + str(percNEnough) + "%")
@@ -289,18 +590,28 @@ class DataPlotter:
         plt.clf()
 
     def plot(self):
-        data = []
-        file = self.__fileLoader.getNextFile()
-        while file:
-            data.append(json.load(file))
-            file = self.__fileLoader.getNextFile()
+        results, skills = self.__countData()
 
-        self.__plotYDistribution(data)
-        self.__plotMissingPlayerSkill(data)
+        self.__plotYDistribution(results)
+        self.__plotMissingPlayerSkill(skills)
 
 
 class ImagePrinter:
 
+    # colors of the skills from 0 to 100 in 256 steps, from red to green
+    COLOR_RAMP = np.linspace(mpl.colors.to_rgb("#ff0000"), mpl.colors.to_rgb("#00cc00"), 256)
+
+    # figure reused for every image of the fast mode, one per process
+    __canvas = None
+
+    # rasterized images have the default size and value range of flow_from_directory
+    RASTER_SIZE = 256
+    RASTER_RAMP = np.rint(COLOR_RAMP * 255).astype(np.uint8)
+    # horizontal extent of the rasterized field, wide enough for the working rates of the outer players
+    RASTER_EXTENT = (-10, 110)
+    # offsets of the pixels of a player around its position
+    __DISC = np.argwhere(np.hypot(*np.mgrid[-3:4, -3:4]) <= 3.5) - 3
+
     def __init__(self):
         self.__dComp = DataComposer("")
 
@@ -310,6 +621,9 @@ class ImagePrinter:
         green = np.array(mpl.colors.to_rgb("#00cc00"))
         return mpl.colors.to_hex((1 - mix) * red + mix * green)
 
+    def __getRampColor(self, skill):
+        return self.COLOR_RAMP[min(255, max(0, round(skill * 2.55)))]
+
     def __getPlayerAvg(self, skills):
         if not skills:
             return 50
@@ -323,13 +637,14 @@ class ImagePrinter:
 
         return avg
 
-    def __getPlayerColor(self, player):
+    def __getPlayerSkill(self, player):
         if player["position"] == {"top": 50, "left": 5}:
-            avg = mean([int(value) for value in player["skill"][1][-5:]])
-        else:
-            avg = self.__getPlayerAvg(player["skill"])
-            
-        return self.__getColorBySkill(avg)
+            return mean([int(value) for value in player["skill"][1][-5:]])
+
+        return self.__getPlayerAvg(player["skill"])
+
+    def __getPlayerColor(self, player):
+        return self.__getColorBySkill(self.__getPlayerSkill(player))
 
     def __getWorkingRates(self, skill):
         switch = {
@@ -372,13 +687,135 @@ class ImagePrinter:
         plt.clf()
 
 
-    def print(self):
-        fl = FileLoader("data/matches/test/")
-        match = fl.getNextFile()
-        while match:
-            fileName = path.basename(match.name.split(".")[0])
+    def rasterize(self, match, out=None):
+        """
+        Draws the players of the match with their skill colors and working rates directly into an RGB array
+        of RASTER_SIZE x RASTER_SIZE with values from 0 to 255 on a white background. If out is given,
+        the image is drawn into it
+        """
+        size = self.RASTER_SIZE
+        if out is None:
+            out = np.empty((size, size, 3), np.uint8)
+        out.fill(255)
+
+        points = []
+        colors = []
+        rates = []
+        for index in [0,1]:
+            for member in match["teams"][index]:
+                if member["position"]:
+                    Y = member["position"]["top"]
+                    if index:
+                        X = member["position"]["left"] - 7
+                    else:
+                        X = 107 - member["position"]["left"]
+
+                    # players without skill are drawn with an average one
+                    skill = self.__getPlayerSkill(member) if member["skill"] else 50
+                    colors.append(self.RASTER_RAMP[min(255, max(0, round(skill * 2.55)))])
+                    points.append((X, Y))
+                    rates.append(self.__getWorkingRates(member["skill"]))
+
+        if not points:
+            return out
+
+        left, right = self.RASTER_EXTENT
+        scale = (size - 1) / (right - left)
+        points = np.asarray(points, np.float64)
+        rows = np.rint((100 - points[:, 1]) * (size - 1) / 100).astype(np.int64)
+        cols = np.rint((points[:, 0] - left) * scale).astype(np.int64)
+
+        # all players at once, dropping the pixels outside of the image
+        discRows = rows[:, None] + self.__DISC[:, 0]
+        discCols = cols[:, None] + self.__DISC[:, 1]
+        inside = (discRows >= 0) & (discRows < size) & (discCols >= 0) & (discCols < size)
+        discColors = np.broadcast_to(np.asarray(colors)[:, None], discRows.shape + (3,))
+        out[discRows[inside], discCols[inside]] = discColors[inside]
+
+        # working rates are drawn on top of the players like in the printed images
+        for (X, Y), rate, row in zip(points, rates, rows):
+            start = max(0, round((X - rate[1] - left) * scale))
+            end = min(size - 1, round((X + rate[0] - left) * scale))
+            out[max(0, row):max(0, row + 2), start:end + 1] = 0
+
+        return out
+
+    @classmethod
+    def __getCanvas(cls):
+        if cls.__canvas is None:
+            figure = Figure()
+            cls.__canvas = FigureCanvasAgg(figure)
+            figure.add_subplot()
+        return cls.__canvas
+
+    def __createImageFast(self, match, fileName, baseDir):
+        """
+        Draws the same image as __createImage on a reused figure, with the working rates as one line collection
+        """
+        points = []
+        colors = []
+        segments = []
+        for index in [0,1]:
+            for member in match["teams"][index]:
+                if member["position"]:
+                    colors.append(self.__getRampColor(self.__getPlayerSkill(member)))
+                    Y = member["position"]["top"]
+                    if index:
+                        X = member["position"]["left"] - 7
+                    else:
+                        X = 107 - member["position"]["left"]
+
+                    points.append((X, Y))
+                    rates = self.__getWorkingRates(member["skill"])
+                    segments.append([(X, Y), (X + rates[0], Y)])
+                    segments.append([(X, Y), (X - rates[1], Y)])
+
+        canvas = self.__getCanvas()
+        axes = canvas.figure.axes[0]
+        axes.clear()
+        # drawn like the Line2D bars of pyplot: on top of the players and with projecting caps
+        axes.add_collection(LineCollection(segments, colors="k", linewidths=2, zorder=2, capstyle="projecting"))
+        if points:
+            points = np.asarray(points)
+            axes.scatter(points[:, 0], points[:, 1], c=colors)
+        axes.autoscale_view()
+        axes.axis('off')
+        directory = self.__dComp.getMatchWinner(match["score"])
+        canvas.figure.savefig(baseDir+directory+"/"+fileName+".png")
+
+    def printFile(self, fileName):
+        """
+        Draws the match of the given file in the fast mode
+        """
+        with open(fileName, "rb") as file:
+            match = loadJson(file.read())
+        try:
+            self.__createImageFast(match, path.basename(fileName.split(".")[0]), "data/images/test/")
+        except TypeError:
+            pass
+
+    def print(self, fast=False, workers=None):
+        """
+        Draws an image of every test match. The fast mode draws the matches on a reused figure per process
+        in a pool of workers processes, all cpus if not given
+        """
+        fl = FileLoader("data/matches/test/", prefetch=8)
+        fileNames = fl.getFileNames()
+        if fast:
+            workers = workers or os.cpu_count()
+            if workers <= 1:
+                for fileName in fileNames:
+                    self.printFile(fileName)
+                return
+
+            with ProcessPoolExecutor(workers) as executor:
+                # consume the results to raise errors of the workers
+                for _ in executor.map(self.printFile, fileNames, chunksize=max(1, len(fileNames) // (workers * 4))):
+                    pass
+            return
+
+        for fileName, match in zip(fileNames, fl.loadMatches(fileNames)):
             try:
-                self.__createImage(json.load(match), fileName, "data/images/test/")
+                self.__createImage(match, path.basename(fileName.split(".")[0]), "data/images/test/")
             except TypeError:
                 pass
-            match = fl.getNextFile()
@@ -1,29 +1,96 @@
-import calendar
 import datetime
-import locale
+import re
+
+from bisect import bisect_left
+
+# german month names as used by fifaindex. Formatted without the locale, which is process global
+MONTHS = ["Januar", "Februar", "März", "April", "Mai", "Juni", "Juli", "August", "September", "Oktober",
+          "November", "Dezember"]
+
+
+def formatDate(date) -> str:
+    """
+    Formats the date the way fifaindex displays it, e.g. 05. März 2019
+    """
+    return "{:02d}. {} {}".format(date.day, MONTHS[date.month - 1], date.year)
+
+
+def parseDate(date: str):
+    """
+    Parses a date given as YYYY-MM-DD or DD.MM.YYYY
+    """
+    if "-" in date:
+        return datetime.datetime.strptime(date, '%Y-%m-%d')
+    else:
+        return datetime.datetime.strptime(date, '%d.%m.%Y')
+
+
+def parseDisplayDate(dateStr: str):
+    """
+    Parses a date displayed by fifaindex. Returns None if the string is no such date
+    """
+    match = re.match(r"\s*(\d{1,2})\.\s*(\S+)\s+(\d{4})", dateStr or "")
+    if not match or match.group(2) not in MONTHS:
+        return None
+
+    return datetime.datetime(int(match.group(3)), MONTHS.index(match.group(2)) + 1, int(match.group(1)))
+
+
+class DateIndex:
+    """
+    Holds values by date, sorted to find the value nearest to a date by binary search
+    """
+
+    def __init__(self, values):
+        """
+        values is a dict of date strings as displayed by fifaindex -> value. Strings that are no date are ignored
+        """
+        self.__names = values
+        entries = sorted((parseDisplayDate(dateStr), value) for dateStr, value in values.items()
+                         if parseDisplayDate(dateStr))
+        self.__dates = [entry[0] for entry in entries]
+        self.__values = [entry[1] for entry in entries]
+
+    def getNearest(self, date, searchDepth: int):
+        """
+        Returns the value of the date nearest to the given one. On a tie the later date is chosen.
+        Raises an IndexError if there is no date within searchDepth days
+        """
+        index = bisect_left(self.__dates, date)
+        candidates = [position for position in [index, index - 1] if 0 <= position < len(self.__dates)]
+        # later dates come first, so min keeps them on a tie
+        nearest = min(candidates, key=lambda position: abs((self.__dates[position] - date).days), default=None)
+
+        if nearest is None or abs((self.__dates[nearest] - date).days) > searchDepth:
+            raise IndexError("no date within " + str(searchDepth) + " days of " + date.strftime("%d.%m.%Y"))
+
+        return self.__values[nearest]
+
+    def keys(self):
+        return self.__names.keys()
+
+    def __len__(self):
+        return len(self.__dates)
 
 
 class DateSearch:
 
     def __init__(self, startDate, searchDepth=185):
-        self._startDate = self.__parseDate(startDate)
+        self._startDate = parseDate(startDate)
         self._offset = 0
         self._searchDepth = searchDepth
 
-    def __parseDate(self, date):
-        if "-" in date:
-            return datetime.datetime.strptime(date, '%Y-%m-%d')
-        else:
-            return datetime.datetime.strptime(date, '%d.%m.%Y')
-
     def nextOffset(self):
         self._offset *= -1
         if self._offset >= 0:
             self._offset += 1
 
         if self._offset > self._searchDepth:
-            raise IndexError("date offset out of bounds for start date: " + self._startDate.strftime("%d.%m.%Y") +
-                             "; season: " + str(self.__getSeasonFromDate(self._startDate)))
+            raise IndexError(self.__getOutOfBoundsMessage())
+
+    def __getOutOfBoundsMessage(self) -> str:
+        return ("date offset out of bounds for start date: " + self._startDate.strftime("%d.%m.%Y") +
+                "; season: " + str(self.__getSeasonFromDate(self._startDate)))
 
     def __getSeasonFromDate(self, date):
         if int(date.strftime("%m")) >= 9:
@@ -32,10 +99,18 @@ class DateSearch:
             return date.strftime("%y")
 
     def getSeason(self, date):
-        return self.__getSeasonFromDate(self.__parseDate(date))
+        return self.__getSeasonFromDate(parseDate(date))
 
     def getNextDate(self):
-        locale.setlocale(locale.LC_ALL, 'de_DE')
         date = self._startDate + datetime.timedelta(self._offset)
         self.nextOffset()
-        return date.strftime("%d. %B %Y")
+        return formatDate(date)
+
+    def getNearest(self, index: DateIndex):
+        """
+        Returns the value of the date in the index nearest to the start date, searching as deep as getNextDate
+        """
+        try:
+            return index.getNearest(self._startDate, self._searchDepth)
+        except IndexError:
+            raise IndexError(self.__getOutOfBoundsMessage())
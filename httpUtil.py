@@ -0,0 +1,301 @@
+import json
+import os
+import requests
+import tempfile
+import threading
+import time
+
+import os.path as path
+from hashlib import sha1
+from requests.adapters import HTTPAdapter
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet.task import deferLater
+from urllib.parse import urlsplit
+from urllib3.util.retry import Retry
+
+
+class CacheMissError(LookupError):
+    """
+    Exception that indicates, that a response is not cached while the cache is offline
+    """
+    pass
+
+
+class CachedResponse:
+    """
+    Holds the parts of a cached response that are used by the spiders
+    """
+    # only successful responses are cached
+    ok = True
+
+    def __init__(self, url: str, content: bytes, encoding: str):
+        self.url = url
+        self.content = content
+        self.encoding = encoding
+
+
+class ResponseCache:
+    """
+    Caches responses on disk, keyed by their url
+    """
+
+    def __init__(self, directory: str, ttl=None, maxSize=None, offline=False):
+        """
+        ttl is the number of seconds a response stays valid, maxSize the number of bytes the cache may use.
+        If offline, responses that are not cached raise a CacheMissError instead of being fetched
+        """
+        self.__directory = directory
+        self.__ttl = ttl
+        self.__maxSize = maxSize
+        self.__offline = offline
+        # size of the cache in bytes. Determined on the first store
+        self.__size = None
+        # the cache is shared by the player threads, the size is only accounted while holding this lock
+        self.__lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+
+    def __getPath(self, url: str) -> str:
+        return path.join(self.__directory, sha1(url.encode("utf-8")).hexdigest() + ".cache")
+
+    def __getEntries(self):
+        entries = []
+        for entry in os.scandir(self.__directory):
+            if entry.name.endswith(".cache"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+
+        return entries
+
+    def __evict(self):
+        """
+        Deletes the least recently used responses until the cache fits its size again. Called with the lock held
+        """
+        if self.__size is None:
+            self.__size = sum(entry[1] for entry in self.__getEntries())
+
+        if self.__size <= self.__maxSize:
+            return
+
+        # shrink a bit further than necessary, so not every store has to evict
+        target = self.__maxSize * 0.9
+        for mtime, size, filePath in sorted(self.__getEntries()):
+            if self.__size <= target:
+                break
+            try:
+                os.remove(filePath)
+                self.__size -= size
+            except FileNotFoundError:
+                pass
+
+    def load(self, url: str):
+        """
+        Returns the cached response of the url or None if there is no valid one
+        """
+        filePath = self.__getPath(url)
+        try:
+            with open(filePath, "rb") as cacheFile:
+                header = json.loads(cacheFile.readline())
+                content = cacheFile.read()
+        except FileNotFoundError:
+            return None
+
+        if self.__ttl is not None and time.time() - header["time"] > self.__ttl:
+            return None
+
+        # mark as recently used for the eviction
+        try:
+            os.utime(filePath)
+        except FileNotFoundError:
+            # evicted meanwhile by another thread, the content has been read already
+            pass
+        return CachedResponse(url, content, header["encoding"])
+
+    def store(self, url: str, content: bytes, encoding: str):
+        """
+        Saves a response to the cache
+        """
+        filePath = self.__getPath(url)
+        header = json.dumps({"url": url, "encoding": encoding, "time": time.time()})
+        # write to a unique temporary file first, so an interrupted run can not leave a broken response behind
+        # and threads storing the same url do not write to the same file
+        handle, tmpPath = tempfile.mkstemp(suffix=".tmp", dir=self.__directory)
+        with os.fdopen(handle, "wb") as cacheFile:
+            cacheFile.write(header.encode("utf-8") + b"\n")
+            cacheFile.write(content)
+
+        with self.__lock:
+            oldSize = path.getsize(filePath) if path.isfile(filePath) else 0
+            os.replace(tmpPath, filePath)
+
+            if self.__maxSize is not None:
+                if self.__size is not None:
+                    self.__size += path.getsize(filePath) - oldSize
+                self.__evict()
+
+    def get(self, url: str, fetch):
+        """
+        Returns the cached response of the url. Otherwise the response is fetched by calling fetch with the url
+        and cached if it was successful
+        """
+        cached = self.load(url)
+        if cached:
+            return cached
+
+        if self.__offline:
+            raise CacheMissError("There is no cached response for " + url)
+
+        response = fetch(url)
+        if response.ok:
+            self.store(url, response.content, response.encoding)
+
+        return response
+
+
+class HostRateLimiter:
+    """
+    Schedules requests per host like a token bucket. The delay between two requests to a host adapts to the
+    latency of its responses the way scrapy's AutoThrottle does
+    """
+    # responses that ask to slow down
+    BACKOFF_STATUS = [429, 503]
+
+    def __init__(self, startDelay=1.0, minDelay=0.25, maxDelay=60.0, targetConcurrency=2.0, burst=1):
+        """
+        targetConcurrency is the number of requests that should be in flight per host on average,
+        burst the number of requests that may be sent at once to a host that has been idle
+        """
+        self.__startDelay = startDelay
+        self.__minDelay = minDelay
+        self.__maxDelay = maxDelay
+        self.__targetConcurrency = targetConcurrency
+        self.__burst = burst
+        self.__hosts = {}
+        self.__lock = threading.Lock()
+
+    def __getHost(self, host: str):
+        if host not in self.__hosts:
+            self.__hosts[host] = {"delay": self.__startDelay, "next": 0.0}
+        return self.__hosts[host]
+
+    def reserve(self, url: str) -> float:
+        """
+        Reserves the next free slot for a request to the host of the url.
+        Returns the number of seconds to wait before the request may be sent
+        """
+        now = time.monotonic()
+        with self.__lock:
+            host = self.__getHost(urlsplit(url).netloc)
+            # an idle host has collected tokens for up to burst requests
+            start = max(host["next"], now - (self.__burst - 1) * host["delay"])
+            host["next"] = start + host["delay"]
+
+        return max(0.0, start - now)
+
+    def acquire(self, url: str):
+        """
+        Blocks until a request to the host of the url may be sent
+        """
+        time.sleep(self.reserve(url))
+
+    def feedback(self, url: str, latency: float, status: int):
+        """
+        Adapts the delay of the host of the url to the latency and status of a response
+        """
+        with self.__lock:
+            host = self.__getHost(urlsplit(url).netloc)
+            if status in self.BACKOFF_STATUS:
+                delay = host["delay"] * 2
+            else:
+                delay = (host["delay"] + latency / self.__targetConcurrency) / 2
+                # only successful responses may speed the crawl up
+                if status != 200 and delay < host["delay"]:
+                    delay = host["delay"]
+
+            host["delay"] = min(self.__maxDelay, max(self.__minDelay, delay))
+
+    def getRate(self, host: str) -> float:
+        """
+        Returns the number of requests per second currently allowed for the host
+        """
+        with self.__lock:
+            return 1 / self.__getHost(host)["delay"]
+
+    def getQueueDepth(self, host: str) -> int:
+        """
+        Returns the number of requests to the host that are waiting for their slot
+        """
+        with self.__lock:
+            host = self.__getHost(host)
+            return max(0, round((host["next"] - time.monotonic()) / host["delay"]))
+
+    def getStats(self):
+        """
+        Returns rate and queue depth of every host
+        """
+        with self.__lock:
+            hosts = list(self.__hosts)
+
+        return {host: {"rate": self.getRate(host), "queue": self.getQueueDepth(host)} for host in hosts}
+
+
+# shared by the scrapy requests and the requests of the player spiders
+rateLimiter = HostRateLimiter()
+
+
+class RateLimitMiddleware:
+    """
+    Downloader middleware that schedules scrapy's requests with the shared rate limiter
+    """
+
+    def __init__(self, limiter: HostRateLimiter = None):
+        self.__limiter = limiter or rateLimiter
+
+    async def process_request(self, request, spider=None):
+        wait = self.__limiter.reserve(request.url)
+        if wait > 0:
+            # imported here, so importing this module does not install a reactor
+            from twisted.internet import reactor
+            await maybe_deferred_to_future(deferLater(reactor, wait))
+        return None
+
+    def process_response(self, request, response, spider=None):
+        latency = request.meta.get("download_latency")
+        if latency is not None:
+            self.__limiter.feedback(request.url, latency, response.status)
+        return response
+
+
+class SessionPool:
+    """
+    Shares one session with pooled keep-alive connections for all requests, retrying transient errors
+    """
+    # responses that are worth another try
+    RETRY_STATUS = [429, 500, 502, 503, 504]
+
+    def __init__(self, poolSize=10, retries=3, backoff=0.5, timeout=30, limiter: HostRateLimiter = None):
+        """
+        poolSize is the number of connections kept open per host, backoff the factor of the exponential
+        delay between retries in seconds and timeout the number of seconds to wait for a response.
+        Requests are scheduled with the given limiter or the shared one
+        """
+        self.__timeout = timeout
+        self.__limiter = limiter or rateLimiter
+        retry = Retry(total=retries, backoff_factor=backoff, status_forcelist=self.RETRY_STATUS,
+                      allowed_methods=["GET"], raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=poolSize, max_retries=retry)
+        self.__session = requests.Session()
+        self.__session.mount("https://", adapter)
+        self.__session.mount("http://", adapter)
+
+    def get(self, url: str):
+        """
+        Requests the given url, reusing an open connection to its host if there is one
+        """
+        self.__limiter.acquire(url)
+        start = time.monotonic()
+        response = self.__session.get(url, timeout=self.__timeout)
+        self.__limiter.feedback(url, time.monotonic() - start, response.status_code)
+        return response
+
+    def close(self):
+        self.__session.close()
@@ -13,6 +13,11 @@ class PositionMapper:
     """
     Maps the position data in a css style string to the position on the field.
     """
+    # marks coordinates without a matching position in the lookup table
+    NO_MATCH = -1
+
+    # positions of all integer coordinates, indexed by [top, left]. Built on first use
+    __table = None
 
     def __isPositionEmpty(self, grid, position) -> bool:
         return not np.any(grid[position])
@@ -71,10 +76,66 @@ class PositionMapper:
 
         return self.matchPosition(pos)
 
+    @classmethod
+    def __getTable(cls):
+        """
+        Returns the lookup table of all positions, building it if necessary
+        """
+        if cls.__table is None:
+            table = np.full((101, 101), cls.NO_MATCH, np.int8)
+            for top in range(101):
+                for left in range(101):
+                    position = cls.__searchPosition([top, left])
+                    if position is not None:
+                        table[top, left] = position
+            cls.__table = table
+
+        return cls.__table
+
     def matchPosition(self, pos):
         """
         Searches for a position matching the x and y position given in pos
         """
+        top, left = pos[0], pos[1]
+        if 0 <= top <= 100 and 0 <= left <= 100 and top == int(top) and left == int(left):
+            position = int(self.__getTable()[int(top), int(left)])
+        else:
+            # not covered by the table
+            position = self.__searchPosition(pos)
+
+        if position is None or position == self.NO_MATCH:
+            # position could not be found. Raise an error
+            raise NoMatchError(
+                "The position top: " + str(top) + ", left: " + str(left) + " has no match.")
+
+        return position
+
+    def matchPositions(self, coords, strict=True):
+        """
+        Maps an array of [top, left] pairs given as integer percentages to their positions at once.
+        Coordinates without a match raise a NoMatchError if strict, otherwise they are mapped to NO_MATCH
+        """
+        coords = np.asarray(coords, np.int64)
+        top = coords[..., 0]
+        left = coords[..., 1]
+        inside = (top >= 0) & (top <= 100) & (left >= 0) & (left <= 100)
+
+        positions = np.full(top.shape, self.NO_MATCH, np.int8)
+        positions[inside] = self.__getTable()[top[inside], left[inside]]
+
+        if strict and (positions == self.NO_MATCH).any():
+            missing = coords[positions == self.NO_MATCH][0]
+            raise NoMatchError(
+                "The position top: " + str(missing[0]) + ", left: " + str(missing[1]) + " has no match.")
+
+        return positions
+
+    @staticmethod
+    def __searchPosition(pos):
+        """
+        Checks the x and y position given in pos against the areas of all positions.
+        Returns None if there is no match
+        """
         # TW
         if pos[0] == 50 and pos[1] == 5:
             return 0
@@ -133,9 +194,7 @@ class PositionMapper:
         if 65 <= pos[0] and pos[0] <= 80 and 40 < pos[1] and pos[1] <= 50:
             return 18
 
-        # position could not be found. Raise an error
-        raise NoMatchError(
-            "The position top: " + str(pos[0]) + ", left: " + str(pos[1]) + " has no match.")
+        return None
 
     def map(self, posData, player, grid):
         position = self.matchPosition([posData["top"], posData["left"]])
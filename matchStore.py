@@ -0,0 +1,132 @@
+import json
+import sqlite3
+import threading
+
+from dateSearch import parseDate
+from os import makedirs, path
+
+
+def toIsoDate(date: str) -> str:
+    """
+    Converts a date given as YYYY-MM-DD or DD.MM.YYYY to YYYY-MM-DD, so dates compare and sort as text
+    """
+    return parseDate(date).strftime("%Y-%m-%d")
+
+
+class MatchStore:
+    """
+    Keeps all scraped matches in a single sqlite database, indexed by id, league, season and date.
+    Matches are only ever added, a match that is already stored is kept as it is
+    """
+    # matches are read in chunks of ids, sqlite limits the number of variables of a query
+    CHUNK_SIZE = 500
+
+    def __init__(self, filePath: str):
+        self.__filePath = filePath
+        self.__lock = threading.Lock()
+        # opened on first use, so the store can be handed to other processes before
+        self.__connection = None
+
+    def __getstate__(self):
+        return {"filePath": self.__filePath}
+
+    def __setstate__(self, state):
+        self.__init__(state["filePath"])
+
+    def __getConnection(self):
+        if self.__connection is None:
+            directory = path.dirname(self.__filePath)
+            if directory:
+                makedirs(directory, exist_ok=True)
+            connection = sqlite3.connect(self.__filePath, check_same_thread=False)
+            # readers do not block the spider writing new matches
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("CREATE TABLE IF NOT EXISTS matches (id TEXT PRIMARY KEY, league TEXT, season TEXT, "
+                               "date TEXT, data TEXT)")
+            connection.execute("CREATE INDEX IF NOT EXISTS matches_league ON matches (league, season, date)")
+            connection.execute("CREATE INDEX IF NOT EXISTS matches_season ON matches (season, date)")
+            connection.execute("CREATE INDEX IF NOT EXISTS matches_date ON matches (date)")
+            connection.commit()
+            self.__connection = connection
+        return self.__connection
+
+    def __getWhere(self, league=None, season=None, since=None, until=None):
+        """
+        Builds the condition of a query for the given filters. league and season may be single values or lists,
+        since and until limit the date, both inclusive and given like the dates of add
+        """
+        conditions = []
+        values = []
+        for column, value in [("league", league), ("season", season)]:
+            if value is None:
+                continue
+            if isinstance(value, str):
+                value = [value]
+            conditions.append(column + " IN (" + ", ".join("?" * len(value)) + ")")
+            values += list(value)
+        if since is not None:
+            conditions.append("date >= ?")
+            values.append(toIsoDate(since))
+        if until is not None:
+            conditions.append("date <= ?")
+            values.append(toIsoDate(until))
+
+        if not conditions:
+            return "", values
+        return " WHERE " + " AND ".join(conditions), values
+
+    def add(self, matchId: str, league: str, season: str, date: str, match):
+        """
+        Stores the match under the given id, the date given as YYYY-MM-DD or DD.MM.YYYY.
+        Returns false if there already is a match with this id
+        """
+        with self.__lock:
+            connection = self.__getConnection()
+            cursor = connection.execute("INSERT OR IGNORE INTO matches VALUES (?, ?, ?, ?, ?)",
+                                        (matchId, league, season, toIsoDate(date), json.dumps(match)))
+            connection.commit()
+            return cursor.rowcount > 0
+
+    def has(self, matchId: str) -> bool:
+        with self.__lock:
+            return self.__getConnection().execute("SELECT 1 FROM matches WHERE id = ?", (matchId,)).fetchone() is not None
+
+    def getIds(self, league=None, season=None, since=None, until=None):
+        """
+        Returns the ids of all matches passing the filters, ordered by date and id
+        """
+        where, values = self.__getWhere(league, season, since, until)
+        with self.__lock:
+            rows = self.__getConnection().execute("SELECT id FROM matches" + where + " ORDER BY date, id", values)
+            return [row[0] for row in rows]
+
+    def load(self, matchIds):
+        """
+        Yields the matches with the given ids in the given order, reading them in chunks
+        """
+        for start in range(0, len(matchIds), self.CHUNK_SIZE):
+            chunk = matchIds[start:start + self.CHUNK_SIZE]
+            with self.__lock:
+                rows = dict(self.__getConnection().execute(
+                    "SELECT id, data FROM matches WHERE id IN (" + ", ".join("?" * len(chunk)) + ")", chunk))
+            for matchId in chunk:
+                yield json.loads(rows[matchId])
+
+    def getFingerprint(self, league=None, season=None, since=None, until=None):
+        """
+        Describes the matches passing the filters by their number and the last one added, to detect changes
+        """
+        where, values = self.__getWhere(league, season, since, until)
+        with self.__lock:
+            return list(self.__getConnection().execute("SELECT count(*), max(rowid) FROM matches" + where,
+                                                       values).fetchone())
+
+    def close(self):
+        with self.__lock:
+            if self.__connection is not None:
+                self.__connection.close()
+                self.__connection = None
+
+    def __len__(self):
+        with self.__lock:
+            return self.__getConnection().execute("SELECT count(*) FROM matches").fetchone()[0]
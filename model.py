@@ -1,8 +1,10 @@
 
+import math
 import pickle
 
 import matplotlib.pyplot as plt
 import numpy as np
+import tensorflow as tf
 
 from sklearn.metrics import classification_report
 from sklearn.model_selection import train_test_split
@@ -10,6 +12,7 @@ from sklearn.preprocessing import LabelBinarizer
 from tensorflow.keras.layers import Dense, Dropout, Flatten, Convolution2D, MaxPooling2D
 from tensorflow.keras.models import Sequential, load_model
 from tensorflow.keras.optimizers import SGD
+from tensorflow.keras.utils import Sequence
 from keras.preprocessing.image import ImageDataGenerator
 
 import data
@@ -53,12 +56,91 @@ class Model:
         plt.savefig(fileDir + "training.png")
 
 
+class MatchSequence(Sequence):
+    """
+    Feeds matches to a model, converting them to float32 one batch at a time
+    """
+
+    def __init__(self, composer, matches, labels, batchSize: int, shuffle=False):
+        super().__init__()
+        self.__composer = composer
+        self.__matches = matches
+        self.__labels = labels
+        self.__batchSize = batchSize
+        self.__shuffle = shuffle
+        self.__order = np.arange(len(matches))
+        self.on_epoch_end()
+
+    def __len__(self):
+        return math.ceil(len(self.__matches) / self.__batchSize)
+
+    def __getitem__(self, index):
+        batch = self.__order[index * self.__batchSize:(index + 1) * self.__batchSize]
+        matches = self.__composer.toFloat(self.__matches[batch])
+        if self.__labels is None:
+            return matches
+
+        return matches, self.__labels[batch]
+
+    def on_epoch_end(self):
+        if self.__shuffle:
+            np.random.shuffle(self.__order)
+
+
+class ImageSequence(Sequence):
+    """
+    Feeds matches to a model as images, rasterizing them one batch at a time instead of reading image files
+    """
+
+    def __init__(self, composer, keys, labels, batchSize: int, shuffle=False):
+        super().__init__()
+        self.__composer = composer
+        self.__keys = keys
+        self.__labels = labels
+        self.__batchSize = batchSize
+        self.__shuffle = shuffle
+        self.__printer = data.ImagePrinter()
+        self.__order = np.arange(len(keys))
+        self.on_epoch_end()
+
+    def __len__(self):
+        return math.ceil(len(self.__keys) / self.__batchSize)
+
+    def __getitem__(self, index):
+        batch = self.__order[index * self.__batchSize:(index + 1) * self.__batchSize]
+        size = data.ImagePrinter.RASTER_SIZE
+        images = np.empty((len(batch), size, size, 3), np.uint8)
+        for image, match in zip(images, self.__composer.loadMatches([self.__keys[key] for key in batch])):
+            self.__printer.rasterize(match, out=image)
+
+        # flow_from_directory yields float32 values from 0 to 255 as well
+        images = images.astype(np.float32)
+        if self.__labels is None:
+            return images
+
+        return images, self.__labels[batch]
+
+    def on_epoch_end(self):
+        if self.__shuffle:
+            np.random.shuffle(self.__order)
+
+
 class MatrixModel(Model):
 
-    def _buildModel(self, data):
+    def __init__(self, learningRate: float, epochs: int, batchSize=16, dataSplit=.8, stream=False, compact=False,
+                 balance=True):
+        super().__init__(learningRate, epochs, batchSize, dataSplit)
+        # stream the match files while training instead of loading all of them beforehand
+        self._stream = stream
+        # oversample the less frequent results of the training data, streamed or not
+        self._balance = balance
+        # keep the matches as uint8 and convert them per batch
+        self._compact = compact
+
+    def _buildModel(self, inputShape):
         print("[INFO] building network")
         self._model = Sequential()
-        self._model.add(Dense(12, input_shape=self.getDataShape(data), activation="sigmoid"))
+        self._model.add(Dense(12, input_shape=inputShape, activation="sigmoid"))
         self._model.add(Dropout(.2))
         self._model.add(Flatten())
         self._model.add(Dense(6, activation="sigmoid"))
@@ -68,43 +150,102 @@ class MatrixModel(Model):
         opt = SGD(lr=self._learningRate)
         self._model.compile(loss="categorical_crossentropy", optimizer=opt, metrics=["accuracy"])
 
+    def _getTrainingComposer(self, balance=True):
+        # the matches of every league and season crawled into data/matches/, the test matches are kept apart
+        return data.DataComposer("data/matches/", includeOldStats=False, includeBench=False, balance=balance,
+                                 cacheDirectory="data/cache/", compact=self._compact, recursive=True,
+                                 exclude=["test"])
+
+    def _getPredictComposer(self):
+        return data.DataComposer("data/matches/test/", includeOldStats=False, includeBench=False, balance=True,
+                                 cacheDirectory="data/cache/", compact=self._compact)
+
     def getTrainingData(self):
-        dc = data.DataComposer("data/matches/", includeOldStats=False, includeBench=False, balance=True)
-        return dc.getData()
+        return self._getTrainingComposer().getData()
 
     def getPredictData(self):
-        dc = data.DataComposer("data/matches/test/", includeOldStats=False, includeBench=False, balance=True)
-        return dc.getData()
+        return self._getPredictComposer().getData()
 
     def getDataShape(self, data):
         return (len(data[0]), len(data[0][0]))
 
     def splitData(self, data):
-        splitAt = round(len(data["matches"])*0.8)
+        # convert once, both parts are views of the converted data. Compact data is converted per batch
+        matches = data["matches"] if self._compact else np.asarray(data["matches"], np.float32)
+        splitAt = round(len(matches) * self._dataSplit)
         return {
-            "trainX": np.asarray(data["matches"][:splitAt], np.float32),
+            "trainX": matches[:splitAt],
             "trainY": data["results"][:splitAt],
-            "testX": np.asarray(data["matches"][splitAt:], np.float32),
+            "testX": matches[splitAt:],
             "testY": data["results"][splitAt:]
         }
 
+    def _streamData(self, composer, keys, shuffle=False):
+        """
+        Creates a dataset that parses the given matches while it is iterated and yields float32 batches
+        """
+        classes = self._labelBinarizer.classes_
+        labels = dict(zip(classes, self._labelBinarizer.transform(classes).astype(np.float32)))
+
+        def generate():
+            for match, result in composer.iterData(keys):
+                yield composer.toFloat(match), labels[result]
+
+        dataSet = tf.data.Dataset.from_generator(generate, output_signature=(
+            tf.TensorSpec(shape=composer.getMatchShape(), dtype=tf.float32),
+            tf.TensorSpec(shape=(len(classes),), dtype=tf.float32)))
+        if shuffle:
+            dataSet = dataSet.shuffle(self._batchSize * 16)
+
+        return dataSet.batch(self._batchSize).prefetch(1)
+
+    def __trainStreaming(self):
+        composer = self._getTrainingComposer(balance=False)
+        # read the results once, so the streamed matches are balanced like the loaded ones
+        keys, results = composer.getResults(composer.getKeys())
+        if self._balance:
+            keys = [keys[index] for index in composer.balanceIndexes(results)]
+        # split by index, the matches themselves are only read while training
+        splitAt = round(len(keys) * self._dataSplit)
+
+        self._labelBinarizer.fit(data.DataComposer.WINNING_LABELS)
+        self._buildModel(composer.getMatchShape())
+        self._history = self._model.fit(self._streamData(composer, keys[:splitAt], shuffle=True),
+                                        validation_data=self._streamData(composer, keys[splitAt:]),
+                                        epochs=self._epochs, verbose=1)
+
     def trainNewModel(self):
-        dataSet = self.splitData(self.getTrainingData())
+        if self._stream:
+            self.__trainStreaming()
+            return
+
+        composer = self._getTrainingComposer(balance=self._balance)
+        dataSet = self.splitData(composer.getData())
 
         trainY = self._labelBinarizer.fit_transform(dataSet["trainY"])
         testY = self._labelBinarizer.transform(dataSet["testY"])
 
-        self._buildModel(dataSet["trainX"])
+        self._buildModel(self.getDataShape(dataSet["trainX"]))
+        if self._compact:
+            self._history = self._model.fit(MatchSequence(composer, dataSet["trainX"], trainY, self._batchSize, shuffle=True),
+                                            validation_data=MatchSequence(composer, dataSet["testX"], testY, self._batchSize),
+                                            epochs=self._epochs, verbose=1)
+            return
+
         self._history = self._model.fit(x=dataSet["trainX"], y=trainY, validation_data=(dataSet["testX"], testY),
                                           epochs=self._epochs, batch_size=self._batchSize, verbose=1)
 
     def predict(self):
-        dataSet = self.getPredictData()
-        dataSet["matches"] = np.asarray(dataSet["matches"], np.float32)
+        composer = self._getPredictComposer()
+        dataSet = composer.getData()
         truePreds = 0
         falsePreds = 0
         # make a prediction on the data
-        preds = self._model.predict(dataSet["matches"])
+        if self._compact:
+            preds = self._model.predict(MatchSequence(composer, dataSet["matches"], None, self._batchSize))
+        else:
+            dataSet["matches"] = np.asarray(dataSet["matches"], np.float32)
+            preds = self._model.predict(dataSet["matches"])
         # find the class label index with the largest corresponding probability
         
         argmax = preds.argmax(axis=1)
@@ -126,9 +267,36 @@ class MatrixModel(Model):
     
 class ImageModel(Model):
 
-    def __init__(self, learningRate: float, epochs: int, batchSize=16, dataSplit=.8):
+    def __init__(self, learningRate: float, epochs: int, batchSize=16, dataSplit=.8, rasterize=False):
         super().__init__(learningRate, epochs, batchSize, dataSplit)
         self._dataGen = ImageDataGenerator(validation_split=dataSplit)
+        # draw the images from the matches while training instead of reading printed ones
+        self._rasterize = rasterize
+
+    def _getTrainingComposer(self):
+        return data.DataComposer("data/matches/", includeOldStats=False, includeBench=False, recursive=True,
+                                 exclude=["test"])
+
+    def _getLabeledKeys(self, composer):
+        """
+        Reads the results of all included matches once. Returns their keys and one hot labels,
+        ordered like the classes of flow_from_directory
+        """
+        keys, results = composer.getResults(composer.getKeys())
+        self._labelBinarizer.fit(data.DataComposer.WINNING_LABELS)
+        return keys, self._labelBinarizer.transform(results).astype(np.float32)
+
+    def __trainRasterized(self):
+        composer = self._getTrainingComposer()
+        keys, labels = self._getLabeledKeys(composer)
+        # split by index, the images are only drawn while training
+        splitAt = round(len(keys) * self._dataSplit)
+
+        self.__buildModel()
+        self._history = self._model.fit(
+            ImageSequence(composer, keys[:splitAt], labels[:splitAt], self._batchSize, shuffle=True),
+            validation_data=ImageSequence(composer, keys[splitAt:], labels[splitAt:], self._batchSize),
+            epochs=self._epochs, verbose=1)
 
     def __buildModel(self):
         print("[INFO] building network")
@@ -145,6 +313,10 @@ class ImageModel(Model):
         self._model.compile(loss="categorical_crossentropy", optimizer=opt, metrics=["accuracy"])
 
     def trainNewModel(self):
+        if self._rasterize:
+            self.__trainRasterized()
+            return
+
         self.__buildModel()
         self._history = self._model.fit(self._dataGen.flow_from_directory("data/images/train", batch_size=self._batchSize))
 
@@ -0,0 +1,145 @@
+import math
+import re
+import unicodedata
+import numpy as np
+
+
+# letters that do not decompose into a base letter and an accent
+SPECIAL_LETTERS = str.maketrans({"ø": "o", "đ": "d", "ł": "l", "æ": "ae", "œ": "oe", "ı": "i", "þ": "th"})
+
+
+def normalizeName(name: str) -> str:
+    """
+    Normalizes a name to compare it regardless of case, accents, hyphens, apostrophes and the order of its parts
+    """
+    decomposed = unicodedata.normalize("NFKD", name.casefold().translate(SPECIAL_LETTERS))
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(sorted(part for part in re.split(r"[\s\-'’`.]+", stripped) if part))
+
+
+class NameIndex:
+    """
+    Finds values by names that may be spelled slightly differently, using the character trigrams of the names
+    """
+
+    def __init__(self, minScore=0.6, maxCandidates=2000):
+        """
+        minScore is the dice coefficient of the trigrams a name needs at least to be found.
+        Candidates are collected from the rarest trigrams of a name until about maxCandidates are found
+        """
+        self.__minScore = minScore
+        self.__maxCandidates = maxCandidates
+        self.__exact = {}
+        self.__values = []
+        self.__trigramIds = {}
+        # trigram id -> ids of the names containing it, in ascending order
+        self.__postings = []
+        # trigram ids of every name
+        self.__nameTrigrams = []
+        # the lists above as arrays. Rebuilt on the first search after adding names
+        self.__arrays = None
+
+    def __getTrigrams(self, name: str):
+        trigrams = set()
+        for part in name.split(" "):
+            # pad the parts, so their beginnings and ends count as well
+            padded = " " + part + " "
+            for index in range(len(padded) - 2):
+                trigrams.add(padded[index:index + 3])
+        return trigrams
+
+    def __getArrays(self):
+        if self.__arrays is None:
+            sizes = np.asarray([len(trigrams) for trigrams in self.__nameTrigrams], np.int64)
+            self.__arrays = {
+                "postings": [np.asarray(ids, np.int32) for ids in self.__postings],
+                "sizes": sizes,
+                # trigram ids of all names one after another, each name starting at its offset
+                "offsets": np.cumsum(sizes) - sizes,
+                "trigrams": np.fromiter((trigram for trigrams in self.__nameTrigrams for trigram in trigrams),
+                                        np.int32, int(sizes.sum()))
+            }
+        return self.__arrays
+
+    def add(self, name: str, value):
+        """
+        Adds a value under the given name. The first value added for a name is kept
+        """
+        key = normalizeName(name)
+        if not key or key in self.__exact:
+            return
+
+        nameId = len(self.__values)
+        self.__exact[key] = nameId
+        self.__values.append(value)
+        trigramIds = []
+        for trigram in self.__getTrigrams(key):
+            if trigram not in self.__trigramIds:
+                self.__trigramIds[trigram] = len(self.__postings)
+                self.__postings.append([])
+            trigramIds.append(self.__trigramIds[trigram])
+            self.__postings[trigramIds[-1]].append(nameId)
+        self.__nameTrigrams.append(trigramIds)
+        self.__arrays = None
+
+    def __getCandidates(self, postings, required):
+        """
+        Collects the names containing the rarest trigrams. A name with enough shared trigrams has to contain
+        one of the rarest len - required + 1 of them, so the candidates are complete unless there are too many.
+        Names containing several of them are included more than once
+        """
+        chosen = []
+        count = 0
+        for posting in postings[:len(postings) - required + 1]:
+            if chosen and count + len(posting) > self.__maxCandidates:
+                break
+            chosen.append(posting)
+            count += len(posting)
+
+        return np.concatenate(chosen)
+
+    def find(self, name: str):
+        """
+        Returns the value of the most similar name or None if no name is similar enough
+        """
+        key = normalizeName(name)
+        # names of nothing but separators have no trigrams to compare
+        if not key:
+            return None
+        if key in self.__exact:
+            return self.__values[self.__exact[key]]
+
+        trigrams = self.__getTrigrams(key)
+        arrays = self.__getArrays()
+        trigramIds = [self.__trigramIds[trigram] for trigram in trigrams if trigram in self.__trigramIds]
+        # a name with a high enough score shares at least this many trigrams
+        required = math.ceil(self.__minScore * len(trigrams) / (2 - self.__minScore))
+        if not trigramIds or len(trigramIds) < required:
+            return None
+
+        postings = sorted((arrays["postings"][trigramId] for trigramId in trigramIds), key=len)
+        candidates = self.__getCandidates(postings, required)
+        # names with too many trigrams can not reach the score either
+        sizes = arrays["sizes"][candidates]
+        candidates = candidates[sizes <= len(trigrams) * (2 - self.__minScore) / self.__minScore]
+        if not len(candidates):
+            return None
+
+        # count the shared trigrams of all candidates at once
+        isShared = np.zeros(len(self.__postings), bool)
+        isShared[trigramIds] = True
+        sizes = arrays["sizes"][candidates]
+        starts = np.cumsum(sizes) - sizes
+        positions = np.arange(sizes.sum()) + np.repeat(arrays["offsets"][candidates] - starts, sizes)
+        shared = np.add.reduceat(isShared[arrays["trigrams"][positions]], starts)
+
+        scores = 2 * shared / (len(trigrams) + sizes)
+        bestScore = scores.max()
+        if bestScore < self.__minScore:
+            return None
+
+        # prefer the name added first
+        return self.__values[int(candidates[scores == bestScore].min())]
+
+    def __len__(self):
+        return len(self.__values)
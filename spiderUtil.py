@@ -22,13 +22,27 @@ class FbrefFixtureResponseWrapper(AbstractFbrefResponseWrapper):
 
     def __init__(self, response: HtmlResponse):
         super().__init__(response)
-        self.__tableRows = self._response.css("div[class='table_outer_container'] > div > table")[0].css(
+        tableRows = self._response.css("div[class='table_outer_container'] > div > table")[0].css(
             "tbody > tr:not([class^='thead'])").css("tr:not([class^='spacer partial_table'])")
+        self.__rows = [self.__extractRow(row) for row in tableRows]
         self.__currentRow = -1
-        self.__rowCount = len(self.__tableRows)
+        self.__rowCount = len(self.__rows)
 
-    def __getDataField(self, field: str) -> str:
-        return self.__tableRows[self.__currentRow].css("td[data-stat='" + field + "'] > a::text").get()
+    def __extractRow(self, row: Selector) -> Dict[str, Dict[str, str]]:
+        """
+        Reads the text and href of the link in every field of the row in one pass over its cells
+        """
+        result = {}
+        for cell in row.root.iterchildren("td"):
+            field = cell.get("data-stat")
+            link = cell.find("a")
+            if field and field not in result and link is not None:
+                result[field] = {"text": link.text, "href": link.get("href")}
+
+        return result
+
+    def __getDataField(self, field: str, attribute="text") -> str:
+        return self.__rows[self.__currentRow].get(field, {}).get(attribute)
 
     def nextRow(self) -> bool:
         """
@@ -74,7 +88,7 @@ class FbrefFixtureResponseWrapper(AbstractFbrefResponseWrapper):
         """
         Generates a full URL to the match report of the current match
         """
-        return "https://fbref.com" + self.__tableRows[self.__currentRow].css("td[data-stat='match_report'] > a::attr(href)").get()
+        return "https://fbref.com" + self.__getDataField("match_report", "href")
 
     def hasScore(self) -> bool:
         """
@@ -109,9 +123,22 @@ class FbrefMatchResponseWrapper(AbstractFbrefResponseWrapper):
         self.__score = matchScore
         if self.hasField():
             self.__field = self.__field[0]
+            positions = self.__getPositions()
             self.__teamSelector = response.css("div[class='lineup'] > table")
             for team in self.__teamSelector:
-                self.__teams.append(Team(team, self.__field, playerSpider))
+                self.__teams.append(Team(team, positions, playerSpider))
+
+    def __getPositions(self) -> Dict[str, str]:
+        """
+        Collects the style of every player on the field by name. The first style of a name is kept
+        """
+        result = {}
+        for player in self.__field.root.iterdescendants("div"):
+            name = player.get("title")
+            if name is not None and name not in result:
+                result[name] = player.get("style")
+
+        return result
 
     def hasField(self) -> bool:
         """
@@ -119,16 +146,26 @@ class FbrefMatchResponseWrapper(AbstractFbrefResponseWrapper):
         """
         return bool(self.__field)
 
-    def getTeams(self):
-        return [team.toArray() for team in self.__teams]
+    def getPlayerNames(self):
+        """
+        Returns the names of the players of both teams
+        """
+        return [member.getName() for team in self.__teams for member in team]
+
+    def getTeams(self, players=None):
+        return [team.toArray(players) for team in self.__teams]
 
-    def getData(self):
-        return {"teams": self.getTeams(), "score": self.__score}
+    def getData(self, players=None):
+        """
+        Encodes the match. If players is given, the skills are taken from it by player name
+        instead of being requested by the player spider
+        """
+        return {"teams": self.getTeams(players), "score": self.__score}
 
 
 class Team:
 
-    def __init__(self, teamSelector: Selector, positions: Selector, playerSpider):
+    def __init__(self, teamSelector: Selector, positions: Dict[str, str], playerSpider):
         self.__teamSelector = teamSelector.css("tr")
         # delete headers from team table
         del self.__teamSelector[12]
@@ -150,24 +187,27 @@ class Team:
 
         raise StopIteration
 
-    def toArray(self):
-        return [member.encode() for member in self]
+    def toArray(self, players=None):
+        return [member.encode(players) for member in self]
 
 
 class Member:
 
-    def __init__(self, data: Selector, positions: Selector, playerSpider):
+    def __init__(self, data: Selector, positions: Dict[str, str], playerSpider):
+        """
+        positions holds the style of every player on the field by name
+        """
         self.__playerSpider = playerSpider
         self.__name = data[1].css("::text").get()
         self.__number = int(data[0].css("::text").get())
-        self.__position = positions.css('div[title="' + self.__name + '"]').xpath("@style").extract()
-        if not self.__position:
-            self.__position = None
-        else:
+        self.__position = positions.get(self.__name)
+        if self.__position:
             self.__position = self.__calcPosition()
+        else:
+            self.__position = None
 
     def __calcPosition(self):
-        styleArray = self.__position[0].split(";")
+        styleArray = self.__position.split(";")
         del styleArray[2]
 
         result = {}
@@ -186,9 +226,17 @@ class Member:
 
         return result
 
-    def encode(self):
+    def getName(self) -> str:
+        return self.__name
+
+    def encode(self, players=None):
+        if players is not None:
+            skill = players[self.__name]
+        else:
+            skill = self.__playerSpider.getPlayer(self.__name)
+
         return {"number": self.__number,
                 "name": self.__name,
                 "position": self.__position,
-                "skill": self.__playerSpider.getPlayer(self.__name)
+                "skill": skill
                 }
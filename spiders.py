@@ -1,21 +1,165 @@
 
+import argparse
 import scrapy
 import json
-import requests
-import time
+import re
+import threading
 from spiderUtil import FbrefFixtureResponseWrapper, FbrefMatchResponseWrapper
 
 from hashlib import md5
-from dateSearch import DateSearch
-from itertools import permutations
+from os import listdir, makedirs, path, replace
+from dateSearch import DateIndex, DateSearch
+from httpUtil import ResponseCache, SessionPool, rateLimiter
+from matchStore import MatchStore
+from nameIndex import NameIndex
 from scrapy.http import HtmlResponse
+from scrapy.utils.defer import maybe_deferred_to_future
+from twisted.internet import defer, threads
+from twisted.python.threadpool import ThreadPool
+
+
+class MatchManifest:
+    """
+    Keeps the ids of all matches that have been scraped in a file, one id per line
+    """
+    # marks matches whose report has no lineup, so their reports are not requested again either
+    NO_LINEUP = "nolineup"
+
+    def __init__(self, filePath: str):
+        self.__filePath = filePath
+        self.__ids = set()
+        if path.isfile(filePath):
+            with open(filePath, "r") as manifest:
+                self.__ids = set(line.split()[0] for line in manifest if line.strip())
+
+    def has(self, matchId: str) -> bool:
+        return matchId in self.__ids
+
+    def add(self, matchId: str, hasLineup=True):
+        if matchId in self.__ids:
+            return
+
+        self.__ids.add(matchId)
+        with open(self.__filePath, "a") as manifest:
+            manifest.write(matchId + ("" if hasLineup else " " + self.NO_LINEUP) + "\n")
+
+    def __len__(self):
+        return len(self.__ids)
+
+
+class CrawlCheckpoint:
+    """
+    Saves the state of a crawl to a file, so an interrupted crawl can be resumed where it stopped.
+    Looked up players are appended to a journal next to it, one JSON line per player
+    """
+
+    def __init__(self, filePath: str, resume=False, saveEvery=20):
+        """
+        The state in the file is only loaded if resume is true. It is saved after every saveEvery changes
+        """
+        self.__filePath = filePath
+        self.__journalPath = filePath + ".players"
+        self.__saveEvery = saveEvery
+        self.__changes = 0
+        # pending match urls with the arguments of their callback
+        self.__pending = {}
+        self.__finished = set()
+        # keys of the players already in the journal
+        self.__journaled = set()
+        if resume:
+            self.__load()
+        elif path.isfile(self.__journalPath):
+            # a new crawl starts with an empty journal
+            open(self.__journalPath, "w").close()
+
+    def __load(self):
+        players = []
+        journaled = []
+        if path.isfile(self.__filePath):
+            with open(self.__filePath, "r") as checkpoint:
+                state = json.load(checkpoint)
+            self.__pending = state["pending"]
+            self.__finished = set(state["finished"])
+            # checkpoints written before the journal hold the players themselves
+            players += state.get("players", [])
+        if path.isfile(self.__journalPath):
+            with open(self.__journalPath, "r") as journal:
+                lines = journal.readlines()
+            for line in lines:
+                try:
+                    journaled.append(json.loads(line))
+                except ValueError:
+                    # the last line may be cut off by a crash while appending
+                    pass
+            if lines and not lines[-1].endswith("\n"):
+                # end the cut off line, so it does not swallow the next player appended
+                with open(self.__journalPath, "a") as journal:
+                    journal.write("\n")
+
+        PlayerSpider.addKnownPlayers(players + journaled)
+        # players of an old checkpoint are not journaled yet, so the next save appends them
+        self.__journaled = set(tuple(key) for key, stats in journaled)
+
+    def __changed(self):
+        self.__changes += 1
+        if self.__changes >= self.__saveEvery:
+            self.save()
+
+    def addPending(self, url: str, kwargs):
+        self.__pending[url] = kwargs
+        self.__changed()
+
+    def finish(self, url: str):
+        self.__pending.pop(url, None)
+        self.__finished.add(url)
+        self.__changed()
+
+    def isFinished(self, url: str) -> bool:
+        return url in self.__finished
+
+    def getPending(self):
+        """
+        Returns the pending match urls with the arguments of their callback
+        """
+        return dict(self.__pending)
+
+    def __appendPlayers(self):
+        """
+        Appends the players looked up since the last save to the journal
+        """
+        lines = []
+        for key, stats in PlayerSpider.getKnownPlayers():
+            if key not in self.__journaled:
+                self.__journaled.add(key)
+                lines.append(json.dumps([list(key), stats]) + "\n")
+
+        if lines:
+            with open(self.__journalPath, "a") as journal:
+                journal.writelines(lines)
+
+    def save(self):
+        # the players go first, so the state never refers to finished matches whose players are missing
+        self.__appendPlayers()
+        state = {
+            "pending": self.__pending,
+            "finished": list(self.__finished)
+        }
+        # write to a temporary file first, so a crash while saving does not destroy the last checkpoint
+        tmpPath = self.__filePath + ".tmp"
+        with open(tmpPath, "w") as checkpoint:
+            json.dump(state, checkpoint)
+        replace(tmpPath, self.__filePath)
+        self.__changes = 0
 
 
 class FixturesSpider(scrapy.Spider):
     name = "Fixtures"
 
     custom_settings = {
-        'DOWNLOAD_DELAY': 0.25,
+        # requests to every host are throttled by the shared rate limiter instead of a fixed delay
+        'DOWNLOADER_MIDDLEWARES': {
+            'httpUtil.RateLimitMiddleware': 543,
+        },
     }
 
     start_urls = [
@@ -47,6 +191,84 @@ class FixturesSpider(scrapy.Spider):
         "Ligue-1": 16
     }
 
+    # fbref competition ids of the leagues
+    competitions = {
+        "Premier-League": 9,
+        "La-Liga": 12,
+        "Bundesliga": 20,
+        "Serie-A": 11,
+        "Ligue-1": 13
+    }
+
+    schedule_url = "https://fbref.com/en/comps/{comp}/{season}/schedule/{season}-{league}-Fixtures"
+
+    def __init__(self, *args, output="data/matches/test/", cache=None, cacheTtl=None, cacheSize=None, offline=False,
+                 playerConcurrency=8, retries=3, checkpoint=None, resume=False, bulk=False, crawlLeagues=None,
+                 seasons=None, store=None, **kwargs):
+        """
+        If crawlLeagues and seasons are given, as lists or comma separated, the fixtures of every league in every
+        season are crawled instead of the start urls, e.g. crawlLeagues=Bundesliga,Ligue-1 seasons=2017-2018,2018-2019.
+        Their matches are written to output/league/season/.
+        Matches are written to the directory given by output, which also holds the manifest of scraped matches.
+        If store is given, matches are added to the match store in that file instead, indexed by league, season and date.
+        The state of the crawl is saved to the file given by checkpoint. If resume is set, the crawl continues
+        from the state saved there. If bulk is set, players are looked up in the league listings of fifaindex.
+        Responses of fifaindex are cached in the directory given by cache.
+        At most playerConcurrency players are requested from fifaindex at the same time, failed requests are
+        retried up to retries times.
+        scrapy runspider spiders.py [-a output=data/matches/test/] -a cache=data/httpcache/ [-a cacheTtl=seconds] [-a cacheSize=bytes] [-a offline=1]
+                                    [-a playerConcurrency=8] [-a retries=3] [-a checkpoint=data/crawl.json -a resume=1]
+                                    [-a bulk=1] [-a crawlLeagues=Bundesliga,Ligue-1 -a seasons=2017-2018,2018-2019]
+                                    [-a store=data/matches.sqlite]
+        """
+        super().__init__(*args, **kwargs)
+        self.__output = output
+        self.__scheduleUrls = self.getScheduleUrls(self.__toList(crawlLeagues), self.__toList(seasons))
+        makedirs(output, exist_ok=True)
+        # matches already in the manifest are not requested again
+        manifestPath = path.join(output, "scraped.manifest")
+        if not path.isfile(manifestPath) and any(name.endswith(".txt") for name in listdir(output)):
+            # files of runs before the manifest are named by the time they were scraped and can not be matched
+            self.logger.warning("%s holds match files but no manifest, their matches will be scraped again", output)
+        self.__manifest = MatchManifest(manifestPath)
+        self.__store = MatchStore(store) if store else None
+        self.__bulk = bool(int(bulk))
+        self.__checkpoint = None
+        if checkpoint:
+            self.__checkpoint = CrawlCheckpoint(checkpoint, resume=bool(int(resume)))
+        # one connection per player thread
+        self.__sessions = SessionPool(poolSize=int(playerConcurrency), retries=int(retries))
+        # the player spider blocks while requesting, so it runs in these threads instead of the reactor
+        self.__playerPool = ThreadPool(minthreads=0, maxthreads=int(playerConcurrency), name="players")
+        self.__playerPool.start()
+        self.__responseCache = None
+        if cache:
+            self.__responseCache = ResponseCache(cache, ttl=float(cacheTtl) if cacheTtl else None,
+                                                 maxSize=int(cacheSize) if cacheSize else None,
+                                                 offline=bool(int(offline)))
+
+    def __toList(self, values):
+        if isinstance(values, str):
+            return [value.strip() for value in values.split(",") if value.strip()]
+        return list(values or [])
+
+    def getScheduleUrls(self, leagues, seasons):
+        """
+        Generates the url of the fixtures of every league in every season as dict of url -> partition,
+        the directory of the matches relative to the output
+        """
+        unknown = [league for league in leagues if league not in self.competitions]
+        if unknown:
+            raise ValueError("Unknown leagues " + ", ".join(unknown) + ". Known are " + ", ".join(self.competitions))
+
+        result = {}
+        for league in leagues:
+            for season in seasons:
+                url = self.schedule_url.format(comp=self.competitions[league], season=season, league=league)
+                result[url] = path.join(league, season)
+
+        return result
+
     def __getSeason(self, response) -> str:
         # get the full season string
         seasonStr = response.css("h1[itemprop='name']::text")[0].get()
@@ -58,14 +280,80 @@ class FixturesSpider(scrapy.Spider):
         dFile.write(json.dumps(toDump))
         dFile.close()
 
-    def parseTeams(self, response, fileName, matchDate, matchScore, league):
-        plSpider = PlayerSpider(matchDate, league)
+    def __inPlayerPool(self, function, *args):
+        """
+        Calls the function in the player thread pool. Returns a deferred of its result
+        """
+        # imported here, so importing the spider does not install a reactor
+        from twisted.internet import reactor
+        return threads.deferToThreadPool(reactor, self.__playerPool, function, *args)
+
+    async def start(self):
+        if self.__checkpoint:
+            # continue with the matches that were pending when the last crawl stopped
+            for url, kwargs in self.__checkpoint.getPending().items():
+                yield scrapy.Request(url, callback=self.parseTeams, cb_kwargs=kwargs)
+
+        if self.__scheduleUrls:
+            for url, partition in self.__scheduleUrls.items():
+                yield scrapy.Request(url, callback=self.parse, cb_kwargs={"partition": partition})
+            return
+
+        async for request in super().start():
+            yield request
+
+    def closed(self, reason):
+        for host, stats in rateLimiter.getStats().items():
+            self.logger.info("%s: %.2f requests/s, %d queued", host, stats["rate"], stats["queue"])
+        if self.__checkpoint:
+            self.__checkpoint.save()
+        self.__playerPool.stop()
+        self.__sessions.close()
+        if self.__store is not None:
+            self.__store.close()
+
+    async def parseTeams(self, response, fileName, matchDate, matchScore, league, partition="", leagueName="",
+                         season=""):
+        # creating the player spider may request the season page
+        plSpider = await maybe_deferred_to_future(self.__inPlayerPool(
+            PlayerSpider, matchDate, league, self.__responseCache, self.__sessions, self.__bulk))
 
         wrapper = FbrefMatchResponseWrapper(response, plSpider, matchScore)
         if wrapper.hasField():
-            self.__dumpToFile("data/matches/test/" + fileName + ".txt", wrapper.getData())
+            # request all players at once and assemble the lineups after every one of them is resolved
+            names = wrapper.getPlayerNames()
+            skills = await maybe_deferred_to_future(defer.gatherResults(
+                [self.__inPlayerPool(plSpider.getPlayer, name) for name in names], consumeErrors=True))
+            match = wrapper.getData(dict(zip(names, skills)))
+            if self.__store is not None:
+                self.__store.add(fileName, leagueName, season, matchDate, match)
+            else:
+                directory = path.join(self.__output, partition)
+                makedirs(directory, exist_ok=True)
+                self.__dumpToFile(path.join(directory, fileName + ".txt"), match)
+                self.__manifest.add(fileName)
+        else:
+            # there is nothing to scrape for this match, but its report is not requested again either
+            self.__manifest.add(fileName, hasLineup=False)
+
+        if self.__checkpoint:
+            # the checkpoint knows the match by the url it was requested with
+            self.__checkpoint.finish(response.meta.get("redirect_urls", [response.url])[0])
+
+    def __isScraped(self, matchId: str) -> bool:
+        # matches without a lineup are only in the manifest, even if a store is used
+        if self.__store is not None and self.__store.has(matchId):
+            return True
+        return self.__manifest.has(matchId)
+
+    def getMatchId(self, season: str, data) -> str:
+        """
+        Generates the id of a match. The same match always gets the same id
+        """
+        toHash = str(season) + data["date"] + data["team_a"] + data["team_b"]
+        return md5(toHash.encode('utf-8')).hexdigest()
 
-    def parse(self, response: HtmlResponse):
+    def parse(self, response: HtmlResponse, partition=""):
         season = self.__getSeason(response)
         respWrapper = FbrefFixtureResponseWrapper(response)
 
@@ -73,27 +361,155 @@ class FixturesSpider(scrapy.Spider):
             # check if there is a score. If there is, there is also a match report
             if respWrapper.hasScore():
                 data = respWrapper.extractData()
-                toHash = str(time.time()) + str(season) + data["score"] + data["team_a"] + data["team_b"]
-                md5Hash = md5(toHash.encode('utf-8'))
-                data["match_file"] = str(md5Hash.hexdigest())
+                data["match_file"] = self.getMatchId(season, data)
+                # skip matches that have been scraped by an earlier run
+                if self.__isScraped(data["match_file"]):
+                    continue
 
                 url = respWrapper.generateMatchURL()
+                if self.__checkpoint and self.__checkpoint.isFinished(url):
+                    continue
 
                 league = ""
+                leagueName = ""
                 for key in self.leagues:
                     if key in response.url:
                         league = self.leagues[key]
+                        leagueName = key
+
+                kwargs = dict(fileName=data["match_file"], matchDate=data["date"], matchScore=respWrapper.getMatchScore(),
+                              league = league, partition=partition, leagueName=leagueName, season=season)
+                if self.__checkpoint:
+                    self.__checkpoint.addPending(url, kwargs)
+                yield scrapy.Request(url, callback=self.parseTeams, cb_kwargs=kwargs)
+
+
+class Memo:
+    """
+    Thread safe memo that computes the value of every key only once. Concurrent callers of a key wait for the first one
+    """
+
+    def __init__(self):
+        self.__values = {}
+        self.__lock = threading.Lock()
+        # one lock per key, so computing one key does not block the others
+        self.__keyLocks = {}
+
+    def get(self, key, compute, keep=None):
+        """
+        Returns the value of the key, calling compute if it is not known yet.
+        If keep is given, only values it returns true for are remembered
+        """
+        with self.__lock:
+            if key in self.__values:
+                return self.__values[key]
+            keyLock = self.__keyLocks.setdefault(key, threading.Lock())
+
+        with keyLock:
+            with self.__lock:
+                if key in self.__values:
+                    return self.__values[key]
+
+            value = compute()
+            with self.__lock:
+                if keep is None or keep(value):
+                    self.__values[key] = value
+                # remembered values are returned without the key lock and values that are not kept are computed
+                # again anyway, so the lock is not needed anymore
+                self.__keyLocks.pop(key, None)
+            return value
+
+    def set(self, key, value):
+        with self.__lock:
+            self.__values[key] = value
+            self.__keyLocks.pop(key, None)
+
+    def items(self):
+        """
+        Returns a copy of all remembered keys and values
+        """
+        with self.__lock:
+            return list(self.__values.items())
+
+    def __len__(self):
+        return len(self.__values)
 
-                yield scrapy.Request(url, callback=self.parseTeams, cb_kwargs=dict(
-                    fileName=data["match_file"], matchDate=data["date"], matchScore=respWrapper.getMatchScore(), league = league))
+
+class SeasonDateIndex:
+    """
+    Holds the searchable fifaindex dates of every season, so each season is only requested once per process
+    """
+
+    def __init__(self, url: str):
+        self.__url = url
+        self.__seasons = Memo()
+
+    def __parse(self, response):
+        basepage = HtmlResponse("", body=response.content, encoding=response.encoding)
+        dates = basepage.css("div[class='dropdown-menu fade-out'] > a[class='dropdown-item']")
+
+        result = {}
+        for date in dates:
+            result[date.css("a::text").get()] = "https://www.fifaindex.com" + date.css("a::attr(href)").get()
+
+        return DateIndex(result)
+
+    def get(self, season: str, fetch):
+        """
+        Returns the dates of the season as DateIndex of search hrefs, parsed once per season.
+        If the season is not known yet, its page is requested by calling fetch with the url
+        """
+        # keep requesting empty seasons, the page may just have failed
+        return self.__seasons.get(season, lambda: self.__parse(fetch(self.__url.format(season=season))), keep=bool)
+
+
+class PlayerTable:
+    """
+    Holds the player hrefs of one league in one fifaindex snapshot, read from the listing of the league
+    """
+
+    def __init__(self):
+        self.__players = NameIndex()
+
+    def add(self, name: str, href: str):
+        self.__players.add(name, href)
+
+    def find(self, name: str):
+        """
+        Returns the href of the player whose name matches the given one best, or None if none is similar enough
+        """
+        return self.__players.find(name)
+
+    def __len__(self):
+        return len(self.__players)
 
 
 class PlayerSpider:
 
     start_url = "https://www.fifaindex.com/de/players/fifa{season}/"
     url_vars = "?name={name}&league={league}&order=desc"
-
-    def __init__(self, date: str, league: str):
+    list_vars = "?league={league}&page={page}"
+    # bound for the pages of a league listing, in case the last page repeats
+    max_list_pages = 100
+
+    # shared by all instances
+    __seasonIndex = SeasonDateIndex(start_url)
+    # used if no sessions are given, created on first use
+    __defaultSessions = None
+    __defaultSessionsLock = threading.Lock()
+    # stats of every player by name, search href and league. Players that were not found are kept as None
+    __playerStats = Memo()
+    # player tables by search href and league
+    __playerTables = Memo()
+
+    def __init__(self, date: str, league: str, cache: ResponseCache = None, sessions: SessionPool = None, bulk=False):
+        """
+        In bulk mode, players are looked up in a table read from the league listing of the snapshot
+        instead of being searched one by one
+        """
+        self.__cache = cache
+        self.__bulk = bulk
+        self.__sessions = sessions or self.__getDefaultSessions()
         self.__date = date
         self.__dSearch = DateSearch(date)
         self.__season = self.__dSearch.getSeason(date)
@@ -101,39 +517,48 @@ class PlayerSpider:
         self.__searchHref = self.__getSearchHref()
         self.__league = league
 
-    def __getSearchableDates(self):
-        response = requests.get(self.start_url.format(season=self.__season))
-        basepage = HtmlResponse("", body=response.content, encoding=response.encoding)
+    @classmethod
+    def __getDefaultSessions(cls) -> SessionPool:
+        """
+        Creates the sessions used if none are given on first use, so importing the module does not open any
+        """
+        with cls.__defaultSessionsLock:
+            if cls.__defaultSessions is None:
+                cls.__defaultSessions = SessionPool()
+            return cls.__defaultSessions
 
-        dates = basepage.css("div[class='dropdown-menu fade-out'] > a[class='dropdown-item']")
+    def __get(self, url: str):
+        """
+        Requests the given url, using the response cache if there is one
+        """
+        if self.__cache:
+            return self.__cache.get(url, self.__sessions.get)
 
-        result = {}
-        for date in dates:
-            result[date.css("a::text").get()] = date
+        return self.__sessions.get(url)
 
-        return result
+    def __getSearchableDates(self):
+        return self.__seasonIndex.get(self.__season, self.__get)
 
     def permutateName(self, name: str):
         """
-        permutates the given name
+        Returns the orders of the name parts to search for: as given and reversed. Every order is one search
+        request, so not all permutations are tried
         """
-        return list(permutations(name.split(" |-|'")))
+        parts = tuple(part for part in re.split(r" |-|'", name) if part)
+        if not parts:
+            return []
+        if len(parts) == 1:
+            return [parts]
+        return [parts, parts[::-1]]
 
     def __getSearchHref(self) -> str:
-        href = None
-        keyList = self.__searchableDates.keys()
-        while not href:
-            try:
-                date = self.__dSearch.getNextDate()
-                if date in keyList:
-                    return "https://www.fifaindex.com" + self.__searchableDates[date].css("a::attr(href)").get()
-
-            except IndexError as err:
-                print(err.args[0])
-                print(self.__searchableDates.keys())
-                break
+        try:
+            return self.__dSearch.getNearest(self.__searchableDates)
+        except IndexError as err:
+            print(err.args[0])
+            print(self.__searchableDates.keys())
 
-        raise ValueError("Could not find matching date for " + date)
+        raise ValueError("Could not find matching date for " + self.__date)
 
     def __getPlayerHrefs(self, name: str):
         nameAttempts = self.permutateName(name)
@@ -145,18 +570,76 @@ class PlayerSpider:
         return result
 
     def __getPlayerStats(self, href: str):
-        response = requests.get(href)
+        response = self.__get(href)
         playerPage = HtmlResponse("", body=response.content, encoding=response.encoding)
         personalInfo = playerPage.css("div[class='card-body'] > p > span::text").getall()
         ratings = playerPage.css("div[class='card-body'] > p > span > span::text").getall()
         
         return [personalInfo, ratings[-34:]]
 
+    @classmethod
+    def getKnownPlayers(cls):
+        """
+        Returns the keys and stats of all players that have been looked up in this process
+        """
+        return cls.__playerStats.items()
+
+    @classmethod
+    def addKnownPlayers(cls, players):
+        """
+        Adds players looked up earlier, given as pairs of key and stats
+        """
+        for key, stats in players:
+            cls.__playerStats.set(tuple(key), stats)
+
     def getPlayer(self, name: str):
+        """
+        Returns the stats of the player in the snapshot of this match, or None if the player could not be found
+        """
+        return self.__playerStats.get((name, self.__searchHref, self.__league), lambda: self.__searchPlayer(name))
+
+    def __loadPlayerTable(self):
+        """
+        Pages through the listing of the league in the snapshot and collects the hrefs of all players
+        """
+        table = PlayerTable()
+        seen = set()
+        for page in range(1, self.max_list_pages + 1):
+            response = self.__get(self.__searchHref + self.list_vars.format(league=self.__league, page=page))
+            listPage = HtmlResponse("", body=response.content, encoding=response.encoding)
+            links = listPage.css("td[data-title='Name'] > a")
+
+            hrefs = [link.css("a::attr(href)").get() for link in links]
+            # stop at the first page without any new players
+            if not set(hrefs) - seen:
+                break
+            seen.update(hrefs)
+
+            for link, href in zip(links, hrefs):
+                href = "https://www.fifaindex.com" + href
+                table.add(link.css("a::text").get() or "", href)
+                # the title holds the full name if the text is shortened
+                if link.css("a::attr(title)").get():
+                    table.add(link.css("a::attr(title)").get(), href)
+
+        return table
+
+    def getPlayerTable(self) -> PlayerTable:
+        """
+        Returns the players of the league in the snapshot of this match. The listing is only read once per process
+        """
+        # keep trying if the listing could not be read
+        return self.__playerTables.get((self.__searchHref, self.__league), self.__loadPlayerTable, keep=len)
+
+    def __searchPlayer(self, name: str):
+        if self.__bulk:
+            href = self.getPlayerTable().find(name)
+            return self.__getPlayerStats(href) if href else None
+
         hrefs = self.__getPlayerHrefs(name)
 
         for href in hrefs:
-            response = requests.get(href)
+            response = self.__get(href)
             searchPage = HtmlResponse("", body=response.content, encoding=response.encoding)
             hrefs = searchPage.css("td[data-title='Name'] > a::attr(href)").getall()
 
@@ -164,4 +647,35 @@ class PlayerSpider:
                 return self.__getPlayerStats("https://www.fifaindex.com" + hrefs[0])
         return None
 
-# scrapy runspider spiders.py
\ No newline at end of file
+# scrapy runspider spiders.py
+
+
+if __name__ == "__main__":
+    from scrapy.crawler import CrawlerProcess
+
+    parser = argparse.ArgumentParser(description="Crawls the fixtures of several leagues and seasons concurrently")
+    parser.add_argument("--leagues", nargs="+", required=True, choices=list(FixturesSpider.competitions))
+    parser.add_argument("--seasons", nargs="+", required=True, help="seasons like 2018-2019")
+    parser.add_argument("--output", default="data/matches/", help="matches are written to output/league/season/")
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight across all domains")
+    parser.add_argument("--domain-concurrency", action="append", default=[], metavar="DOMAIN=N",
+                        help="requests in flight to a single domain, e.g. fbref.com=4")
+    parser.add_argument("--player-concurrency", type=int, default=8, help="players requested from fifaindex at once")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--store", help="file of a match store the matches are added to instead of output")
+    parser.add_argument("--cache", help="directory of the fifaindex response cache")
+    parser.add_argument("--checkpoint", help="file the state of the crawl is saved to")
+    parser.add_argument("--resume", action="store_true")
+    parser.add_argument("--bulk", action="store_true")
+    args = parser.parse_args()
+
+    slots = {}
+    for limit in args.domain_concurrency:
+        domain, count = limit.split("=")
+        slots[domain] = {"concurrency": int(count)}
+
+    process = CrawlerProcess({"CONCURRENT_REQUESTS": args.concurrency, "DOWNLOAD_SLOTS": slots})
+    process.crawl(FixturesSpider, output=args.output, crawlLeagues=args.leagues, seasons=args.seasons,
+                  playerConcurrency=args.player_concurrency, retries=args.retries, cache=args.cache,
+                  checkpoint=args.checkpoint, resume=int(args.resume), bulk=int(args.bulk), store=args.store)
+    process.start()